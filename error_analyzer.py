@@ -5,10 +5,22 @@ Analyseur d'Erreurs de Programmation avec Chatbot
 Analyse les rapports d'erreurs et fournit des explications et corrections via un chatbot
 """
 
+import io
+import os
 import re
+import sys
 import json
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+import math
+import glob
+import heapq
+import fnmatch
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional
+from dataclasses import dataclass, field
 from datetime import datetime
 
 
@@ -21,28 +33,58 @@ class ErrorInfo:
     line: Optional[int] = None
     code_snippet: Optional[str] = None
     language: Optional[str] = None
+    timestamp: Optional[str] = None
+
+
+def _freeze(value):
+    """Copie profonde en lecture seule (dict -> MappingProxyType, list -> tuple)"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
 
 
 class ErrorParser:
-    """Parse les rapports d'erreurs de différents langages"""
-    
-    def __init__(self):
-        self.patterns = {
-            'python': {
-                'traceback': r'Traceback \(most recent call last\):',
-                'error_line': r'File "([^"]+)", line (\d+)',
-                'error_type': r'(\w+Error): (.+)',
-                'syntax_error': r'SyntaxError: (.+)',
-            },
-            'javascript': {
-                'error_line': r'at (.+):(\d+):(\d+)',
-                'error_type': r'(\w+Error): (.+)',
-            },
-            'java': {
-                'error_line': r'at (.+)\((.+):(\d+)\)',
-                'error_type': r'(\w+Exception): (.+)',
-            }
+    """Parse les rapports d'erreurs de différents langages
+    
+    Les expressions régulières sont compilées une seule fois au niveau de la
+    classe et partagées en lecture seule par toutes les instances ; les
+    méthodes de parsing n'utilisent que des variables locales et peuvent
+    être appelées depuis plusieurs threads.
+    """
+    
+    patterns = _freeze({
+        'python': {
+            'traceback': re.compile(r'Traceback \(most recent call last\):'),
+            'error_line': re.compile(r'File "([^"]+)", line (\d+)'),
+            'error_type': re.compile(r'(\w+Error): (.+)'),
+            'syntax_error': re.compile(r'SyntaxError: (.+)'),
+        },
+        'javascript': {
+            'error_line': re.compile(r'at (.+):(\d+):(\d+)'),
+            'error_type': re.compile(r'(\w+Error): (.+)'),
+        },
+        'java': {
+            'error_line': re.compile(r'at (.+)\((.+):(\d+)\)'),
+            'error_type': re.compile(r'(\w+Exception): (.+)'),
         }
+    })
+    # Horodatage des lignes de log (ISO 8601, ex: 2024-05-01 12:00:03,123)
+    timestamp_pattern = re.compile(
+        r'(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)'
+    )
+    
+    def extract_timestamp(self, text: str) -> Optional[str]:
+        """Extrait le premier horodatage du texte au format ISO, ou None"""
+        match = self.timestamp_pattern.search(text)
+        if not match:
+            return None
+        raw = match.group(1).replace(',', '.').replace('Z', '+00:00')
+        try:
+            return datetime.fromisoformat(raw).isoformat()
+        except ValueError:
+            return None
     
     def detect_language(self, error_report: str) -> str:
         """Détecte le langage de programmation à partir du rapport d'erreur"""
@@ -73,6 +115,13 @@ class ErrorParser:
                 language=language
             ))
         
+        # Horodatage du log par défaut pour les erreurs qui n'en ont pas
+        report_timestamp = self.extract_timestamp(error_report)
+        if report_timestamp:
+            for error in errors:
+                if error.timestamp is None:
+                    error.timestamp = report_timestamp
+        
         return errors
     
     def _parse_python_error(self, error_report: str) -> List[ErrorInfo]:
@@ -83,10 +132,16 @@ class ErrorParser:
         file_path = None
         line_number = None
         code_snippet = None
+        timestamp = None
         
         for i, line in enumerate(lines):
+            # Horodatage de la ligne de log la plus récente
+            line_timestamp = self.extract_timestamp(line)
+            if line_timestamp:
+                timestamp = line_timestamp
+            
             # Chercher le fichier et la ligne
-            file_match = re.search(self.patterns['python']['error_line'], line)
+            file_match = self.patterns['python']['error_line'].search(line)
             if file_match:
                 file_path = file_match.group(1)
                 line_number = int(file_match.group(2))
@@ -95,7 +150,7 @@ class ErrorParser:
                     code_snippet = lines[i + 1].strip()
             
             # Chercher le type d'erreur
-            error_match = re.search(self.patterns['python']['error_type'], line)
+            error_match = self.patterns['python']['error_type'].search(line)
             if error_match:
                 errors.append(ErrorInfo(
                     error_type=error_match.group(1),
@@ -103,7 +158,8 @@ class ErrorParser:
                     file=file_path,
                     line=line_number,
                     code_snippet=code_snippet,
-                    language='python'
+                    language='python',
+                    timestamp=timestamp
                 ))
         
         return errors if errors else [ErrorInfo(
@@ -118,9 +174,9 @@ class ErrorParser:
         lines = error_report.split('\n')
         
         for line in lines:
-            error_match = re.search(self.patterns['javascript']['error_type'], line)
+            error_match = self.patterns['javascript']['error_type'].search(line)
             if error_match:
-                file_match = re.search(self.patterns['javascript']['error_line'], error_report)
+                file_match = self.patterns['javascript']['error_line'].search(error_report)
                 file_path = None
                 line_number = None
                 
@@ -148,9 +204,9 @@ class ErrorParser:
         lines = error_report.split('\n')
         
         for line in lines:
-            error_match = re.search(self.patterns['java']['error_type'], line)
+            error_match = self.patterns['java']['error_type'].search(line)
             if error_match:
-                file_match = re.search(self.patterns['java']['error_line'], error_report)
+                file_match = self.patterns['java']['error_line'].search(error_report)
                 file_path = None
                 line_number = None
                 
@@ -173,13 +229,203 @@ class ErrorParser:
         )]
 
 
+@dataclass
+class IntentMatch:
+    """Résultat de la reconnaissance d'intention d'un message"""
+    intent: str
+    language: str = 'fr'
+    entities: List[str] = field(default_factory=list)
+    unknown_entities: List[str] = field(default_factory=list)
+
+
+class IntentEngine:
+    """Reconnaissance d'intentions et d'entités pour le chat (FR/EN)
+    
+    Les mots-clés de toutes les intentions et les noms d'erreurs de la base
+    de connaissances sont compilés dans une seule table de phrases : chaque
+    message est découpé une fois en mots, puis chaque position est résolue
+    par quelques accès dictionnaire. Le coût par message ne dépend donc pas
+    du nombre d'intentions enregistrées.
+    """
+    
+    # intention -> langue -> mots-clés (None : mot-clé commun aux deux langues)
+    INTENTS = {
+        'greeting': {
+            'fr': ['bonjour', 'salut', 'bonsoir', 'coucou'],
+            'en': ['hello', 'hi', 'hey', 'good morning'],
+        },
+        'thanks': {
+            'fr': ['merci'],
+            'en': ['thanks', 'thank you', 'thx'],
+        },
+        'help': {
+            'fr': ['aide', 'aidez moi', 'que sais tu faire'],
+            'en': ['help', 'what can you do'],
+        },
+        'explain': {
+            'fr': ['explique', 'expliquer', 'explication', 'c est quoi', 'qu est ce que',
+                   'que signifie', 'signifie', 'pourquoi'],
+            'en': ['explain', 'what is', 'what does', 'meaning', 'means', 'why'],
+            None: ['cause', 'causes'],
+        },
+        'solutions': {
+            'fr': ['corriger', 'resoudre', 'reparer', 'comment eviter', 'que faire'],
+            'en': ['fix', 'solve', 'resolve', 'how to fix', 'how do i fix', 'avoid'],
+            None: ['solution', 'solutions'],
+        },
+        'compare': {
+            'fr': ['comparer', 'comparaison', 'difference', 'differences', 'entre'],
+            'en': ['comparison', 'between', 'difference between'],
+            None: ['compare', 'vs', 'versus'],
+        },
+    }
+    
+    # Ordre de résolution quand plusieurs intentions sont présentes
+    PRIORITY = ['compare', 'solutions', 'explain', 'help', 'greeting', 'thanks']
+    
+    TOKEN_PATTERN = re.compile(r'[a-z0-9_]+')
+    UNKNOWN_ERROR_PATTERN = re.compile(r'\b([A-Z]\w*(?:Error|Exception))\b')
+    
+    def __init__(self, error_database: Dict):
+        self.phrases = {}
+        for intent, keywords_by_language in self.INTENTS.items():
+            for language, keywords in keywords_by_language.items():
+                for keyword in keywords:
+                    self.phrases[tuple(self._tokenize(keyword))] = (intent, language)
+        # Index des types d'erreurs : 'keyerror', 'key error' -> KeyError
+        self.error_index = {}
+        for error_type in error_database:
+            words = re.findall(r'[A-Z][a-z]*', error_type)
+            self.error_index[(error_type.lower(),)] = error_type
+            self.error_index[tuple(word.lower() for word in words)] = error_type
+        # Longueur (en mots) de la plus longue phrase connue, ex: 'file not found error'
+        self.max_phrase = max(len(phrase) for phrase in (*self.phrases, *self.error_index))
+        # Tables partagées par tous les chatbots : en lecture seule
+        self.phrases = MappingProxyType(self.phrases)
+        self.error_index = MappingProxyType(self.error_index)
+    
+    @classmethod
+    def _tokenize(cls, text: str) -> List[str]:
+        text = unicodedata.normalize('NFKD', text.lower())
+        text = ''.join(char for char in text if not unicodedata.combining(char))
+        return cls.TOKEN_PATTERN.findall(text)
+    
+    def match(self, message: str) -> IntentMatch:
+        """Détermine l'intention, la langue et les types d'erreurs cités"""
+        tokens = self._tokenize(message)
+        intents = set()
+        votes = {'fr': 0, 'en': 0}
+        entities = []
+        
+        position = 0
+        while position < len(tokens):
+            for size in range(min(self.max_phrase, len(tokens) - position), 0, -1):
+                phrase = tuple(tokens[position:position + size])
+                error_type = self.error_index.get(phrase)
+                if error_type is not None:
+                    if error_type not in entities:
+                        entities.append(error_type)
+                    break
+                hit = self.phrases.get(phrase)
+                if hit is not None:
+                    intents.add(hit[0])
+                    if hit[1] is not None:
+                        votes[hit[1]] += 1
+                    break
+            else:
+                size = 1
+            position += size
+        
+        unknown_entities = [name for name in self.UNKNOWN_ERROR_PATTERN.findall(message)
+                            if (name.lower(),) not in self.error_index]
+        language = 'en' if votes['en'] > votes['fr'] else 'fr'
+        
+        if entities or unknown_entities:
+            # Un type d'erreur seul est une demande d'explication
+            intents.add('explain')
+        intent = next((name for name in self.PRIORITY if name in intents), 'unknown')
+        return IntentMatch(intent, language, entities, unknown_entities)
+
+
 class ErrorChatbot:
     """Chatbot qui explique les erreurs et propose des corrections"""
     
-    def __init__(self):
-        self.error_database = self._load_error_database()
+    RESPONSES = {
+        'fr': {
+            'greeting': "Bonjour! Je suis votre assistant pour analyser les erreurs de programmation. Envoyez-moi un rapport d'erreur et je vous aiderai à le comprendre et le corriger.",
+            'help': """Je peux vous aider avec les erreurs de programmation!
+            
+Fonctionnalités:
+1. Analyser les rapports d'erreurs Python, JavaScript et Java
+2. Expliquer les causes des erreurs
+3. Proposer des solutions
+4. Répondre à vos questions sur les erreurs
+
+Exemples: "explique KeyError", "solutions pour TypeError", "compare KeyError et IndexError"
+
+Pour commencer, collez simplement votre rapport d'erreur.""",
+            'thanks': "De rien! N'hésitez pas si vous avez d'autres erreurs à analyser.",
+            'unknown': "Je n'ai pas bien compris votre question. Pouvez-vous reformuler ou coller un rapport d'erreur à analyser?",
+            'missing_entity': "De quelle erreur parlez-vous? Par exemple: \"explique KeyError\".",
+            'missing_second': "Donnez-moi deux types d'erreurs à comparer, par exemple: \"compare KeyError et IndexError\".",
+            'unknown_entity': "Je ne connais pas encore l'erreur {error_type}. Collez le rapport d'erreur complet pour que je l'analyse.",
+            'explain': "{error_type}: {explanation}\n\nCauses possibles:\n{causes}",
+            'solutions': "Solutions pour {error_type}:\n{solutions}",
+            'compare': "Comparaison de {first} et {second}:\n\n{sections}",
+        },
+        'en': {
+            'greeting': "Hello! I am your assistant for programming errors. Send me an error report and I will help you understand and fix it.",
+            'help': """I can help you with programming errors!
+
+Features:
+1. Analyze Python, JavaScript and Java error reports
+2. Explain what causes an error
+3. Suggest solutions
+4. Answer your questions about errors
+
+Examples: "explain KeyError", "how to fix TypeError", "compare KeyError and IndexError"
+
+To get started, just paste your error report.""",
+            'thanks': "You're welcome! Feel free to send other errors to analyze.",
+            'unknown': "I did not quite understand your question. Could you rephrase it or paste an error report to analyze?",
+            'missing_entity': "Which error do you mean? For example: \"explain KeyError\".",
+            'missing_second': "Give me two error types to compare, for example: \"compare KeyError and IndexError\".",
+            'unknown_entity': "I do not know the error {error_type} yet. Paste the full error report so I can analyze it.",
+            'explain': "{error_type}: {explanation}\n\nPossible causes:\n{causes}",
+            'solutions': "Solutions for {error_type}:\n{solutions}",
+            'compare': "Comparing {first} and {second}:\n\n{sections}",
+        },
+    }
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, error_database: Optional[Mapping] = None):
+        if error_database is None:
+            self.error_database, self.intent_engine = self._shared_knowledge_base()
+        else:
+            self.error_database = _freeze(error_database)
+            self.intent_engine = IntentEngine(self.error_database)
+    
+    @classmethod
+    def _shared_knowledge_base(cls) -> tuple:
+        """Base de connaissances figée et moteur d'intentions, construits une seule fois
+        
+        Toutes les instances (et donc tous les threads) partagent les mêmes
+        objets en lecture seule : la mémoire ne dépend pas du nombre d'instances.
+        """
+        shared = cls.__dict__.get('_shared')
+        if shared is None:
+            with cls._shared_lock:
+                shared = cls.__dict__.get('_shared')
+                if shared is None:
+                    database = _freeze(cls._load_error_database())
+                    shared = (database, IntentEngine(database))
+                    cls._shared = shared
+        return shared
     
-    def _load_error_database(self) -> Dict:
+    @staticmethod
+    def _load_error_database() -> Dict:
         """Charge la base de données d'explications d'erreurs"""
         return {
             'NameError': {
@@ -369,173 +615,1017 @@ class ErrorChatbot:
             'code_snippet': error_info.code_snippet,
             'language': error_info.language,
             'explanation': explanation['explanation'],
-            'causes_possibles': explanation['causes'],
-            'solutions': explanation['solutions'],
-            'timestamp': datetime.now().isoformat()
+            # Copies : le résultat appartient à l'appelant, la base reste intacte
+            'causes_possibles': list(explanation['causes']),
+            'solutions': list(explanation['solutions']),
+            'timestamp': error_info.timestamp or datetime.now().isoformat(),
+            # 'log' : horodatage lu dans le rapport ; 'analysis' : heure de l'analyse
+            'timestamp_source': 'log' if error_info.timestamp else 'analysis'
         }
         
         return response
     
     def chat(self, user_message: str) -> str:
         """Interface de chat pour poser des questions sur les erreurs"""
-        # Logique simple de chatbot
-        user_message_lower = user_message.lower()
+        match = self.intent_engine.match(user_message)
+        responses = self.RESPONSES[match.language]
         
-        if 'bonjour' in user_message_lower or 'salut' in user_message_lower:
-            return "Bonjour! Je suis votre assistant pour analyser les erreurs de programmation. Envoyez-moi un rapport d'erreur et je vous aiderai à le comprendre et le corriger."
+        if match.intent not in ('explain', 'solutions', 'compare'):
+            return responses[match.intent]
         
-        elif 'aide' in user_message_lower or 'help' in user_message_lower:
-            return """Je peux vous aider avec les erreurs de programmation!
-            
-Fonctionnalités:
-1. Analyser les rapports d'erreurs Python, JavaScript et Java
-2. Expliquer les causes des erreurs
-3. Proposer des solutions
-4. Répondre à vos questions sur les erreurs
-
-Pour commencer, collez simplement votre rapport d'erreur."""
+        if not match.entities:
+            if match.unknown_entities:
+                return responses['unknown_entity'].format(error_type=match.unknown_entities[0])
+            return responses['missing_entity']
         
-        elif 'merci' in user_message_lower:
-            return "De rien! N'hésitez pas si vous avez d'autres erreurs à analyser."
+        if match.intent == 'compare':
+            if len(match.entities) < 2:
+                return responses['missing_second']
+            first, second = match.entities[:2]
+            sections = '\n\n'.join(
+                self._render_entry(responses, error_type, with_solutions=True)
+                for error_type in (first, second)
+            )
+            return responses['compare'].format(first=first, second=second, sections=sections)
         
-        else:
-            return "Je n'ai pas bien compris votre question. Pouvez-vous reformuler ou coller un rapport d'erreur à analyser?"
+        error_type = match.entities[0]
+        if match.intent == 'solutions':
+            return responses['solutions'].format(
+                error_type=error_type,
+                solutions=self._bullets(self.error_database[error_type]['solutions'])
+            )
+        return self._render_entry(responses, error_type)
+    
+    @staticmethod
+    def _bullets(items: List[str]) -> str:
+        return '\n'.join(f"   • {item}" for item in items)
+    
+    def _render_entry(self, responses: Dict, error_type: str, with_solutions: bool = False) -> str:
+        entry = self.error_database[error_type]
+        text = responses['explain'].format(
+            error_type=error_type,
+            explanation=entry['explanation'],
+            causes=self._bullets(entry['causes'])
+        )
+        if with_solutions:
+            text += '\n\n' + responses['solutions'].format(
+                error_type=error_type, solutions=self._bullets(entry['solutions'])
+            )
+        return text
+
+
+class ResultReporter:
+    """Affichage texte des résultats d'analyse
+    
+    Les gabarits sont préparés une seule fois et la sortie est accumulée puis
+    écrite sur le flux par blocs de `chunk_size` caractères ; l'appelant
+    appelle `flush()` une fois sa sortie terminée. `plain` retire les emojis,
+    `detailed` ajoute le code et les causes possibles.
+    """
+    
+    SEPARATOR = '=' * 70
+    TEMPLATES = {
+        'emoji': {
+            'header': '\n{sep}\n📋 Erreur #{index}: {error_type}\n{sep}\n',
+            'file': '📁 Fichier: {}\n',
+            'line': '📍 Ligne: {}\n',
+            'code': '💻 Code: {}\n',
+            'body': '\n💬 Message: {message}\n\n📖 Explication:\n   {explanation}\n',
+            'causes': '\n🔍 Causes possibles:\n',
+            'solutions': '\n✅ Solutions proposées:\n',
+            'item': '   • {}\n',
+            'source': '📂 Analyse du fichier: {}\n\n',
+            'banner': "{sep}\n🤖 Chatbot d'Analyse d'Erreurs de Programmation\n{sep}\n",
+            'user_prompt': '\n👤 Vous: ',
+            'analyzing': "\n🔍 Analyse du rapport d'erreur en cours...\n\n",
+            'assistant': '\n🤖 Assistant: {}\n',
+            'summary': '\n📊 Résumé: {total} erreur(s), {types} type(s)\n',
+            'summary_row': '   {count:>8}  {error_type}\n',
+            'failure': '❌ {}\n',
+            'success': '✅ {}\n',
+            'export_prompt': "\n💾 Voulez-vous exporter l'analyse en JSON? (o/n): ",
+            'output_prompt': "📝 Nom du fichier de sortie (par défaut: analysis.json): ",
+        },
+        'plain': {
+            'header': '\n{sep}\nErreur #{index}: {error_type}\n{sep}\n',
+            'file': 'Fichier: {}\n',
+            'line': 'Ligne: {}\n',
+            'code': 'Code: {}\n',
+            'body': '\nMessage: {message}\n\nExplication:\n   {explanation}\n',
+            'causes': '\nCauses possibles:\n',
+            'solutions': '\nSolutions proposées:\n',
+            'item': '   - {}\n',
+            'source': 'Analyse du fichier: {}\n\n',
+            'banner': "{sep}\nChatbot d'Analyse d'Erreurs de Programmation\n{sep}\n",
+            'user_prompt': '\nVous: ',
+            'analyzing': "\nAnalyse du rapport d'erreur en cours...\n\n",
+            'assistant': '\nAssistant: {}\n',
+            'summary': '\nRésumé: {total} erreur(s), {types} type(s)\n',
+            'summary_row': '   {count:>8}  {error_type}\n',
+            'failure': '{}\n',
+            'success': '{}\n',
+            'export_prompt': "\nVoulez-vous exporter l'analyse en JSON? (o/n): ",
+            'output_prompt': "Nom du fichier de sortie (par défaut: analysis.json): ",
+        },
+    }
+    
+    def __init__(self, stream: Optional[io.TextIOBase] = None, plain: bool = False,
+                 detailed: bool = True, chunk_size: int = 1 << 16):
+        self.stream = stream
+        self.detailed = detailed
+        self.chunk_size = chunk_size
+        templates = self.TEMPLATES['plain' if plain else 'emoji']
+        self._templates = templates
+        self._header = templates['header'].format
+        self._file = templates['file'].format
+        self._line = templates['line'].format
+        self._code = templates['code'].format
+        self._body = templates['body'].format
+        self._causes = templates['causes']
+        self._solutions = templates['solutions']
+        self._item = templates['item'].format
+        self._source = templates['source'].format
+        self._summary = templates['summary'].format
+        self._summary_row = templates['summary_row'].format
+        self._failure = templates['failure'].format
+        self._banner = templates['banner'].format
+        self._analyzing = templates['analyzing']
+        self._assistant = templates['assistant'].format
+        self._success = templates['success'].format
+        self._buffer = []
+        self._buffered = 0
+    
+    def _write(self, text: str):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.chunk_size:
+            self._drain()
+    
+    def _drain(self):
+        if self._buffer:
+            # sys.stdout est résolu à l'écriture pour suivre les redirections
+            (self.stream or sys.stdout).write(''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+    
+    def flush(self):
+        """Écrit le contenu en attente et vide le flux"""
+        self._drain()
+        (self.stream or sys.stdout).flush()
+    
+    def write_source(self, file_path: str):
+        self._write(self._source(file_path))
+    
+    def write_result(self, index: int, result: Dict):
+        """Ajoute un résultat au tampon de sortie"""
+        item = self._item
+        parts = [self._header(sep=self.SEPARATOR, index=index, error_type=result['error_type'])]
+        if result['file']:
+            parts.append(self._file(result['file']))
+        if result['line']:
+            parts.append(self._line(result['line']))
+        if self.detailed and result['code_snippet']:
+            parts.append(self._code(result['code_snippet']))
+        parts.append(self._body(message=result['message'], explanation=result['explanation']))
+        if self.detailed:
+            parts.append(self._causes)
+            parts.extend(item(cause) for cause in result['causes_possibles'])
+        parts.append(self._solutions)
+        parts.extend(item(solution) for solution in result['solutions'])
+        self._write(''.join(parts))
+    
+    def write_results(self, results: Iterable[Dict], start: int = 1):
+        """Ajoute chaque résultat au tampon de sortie"""
+        for index, result in enumerate(results, start):
+            self.write_result(index, result)
+    
+    def write_failure(self, message: str):
+        """Affiche immédiatement un message d'erreur"""
+        self._write(self._failure(message))
+        self.flush()
+    
+    def write_success(self, message: str):
+        """Affiche immédiatement un message de confirmation"""
+        self._write(self._success(message))
+        self.flush()
+    
+    def write_banner(self, greeting: str):
+        """Ajoute l'en-tête du mode interactif au tampon de sortie"""
+        self._write(self._banner(sep=self.SEPARATOR))
+        self._write(f"{greeting}\n\nTapez 'quit' ou 'exit' pour quitter.\n\n")
+    
+    def write_analyzing(self):
+        self._write(self._analyzing)
+    
+    def write_assistant(self, message: str):
+        """Ajoute une réponse du chatbot au tampon de sortie"""
+        self._write(self._assistant(message))
+    
+    def ask(self, prompt: str) -> str:
+        """Vide la sortie en attente puis pose une question (`export_prompt`...)"""
+        self.flush()
+        return input(self._templates[prompt]).strip()
+    
+    def write_summary(self, results: Iterable[Dict]):
+        """Affiche le nombre d'erreurs par type au lieu du détail"""
+        counts = {}
+        for result in results:
+            counts[result['error_type']] = counts.get(result['error_type'], 0) + 1
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        self._write(self._summary(total=sum(counts.values()), types=len(counts)))
+        for error_type, count in ranked:
+            self._write(self._summary_row(count=count, error_type=error_type))
 
 
 class ErrorAnalyzerChatbot:
-    """Classe principale qui combine le parser et le chatbot"""
+    """Classe principale qui combine le parser et le chatbot
+    
+    Toutes les instances partagent la même base de connaissances figée et
+    les mêmes expressions compilées ; `analyze_error_report` ne conserve
+    aucun état entre deux appels et peut être appelé simultanément depuis
+    plusieurs threads, sans verrou, sur une instance commune.
+    
+    Les composants optionnels (`rate_aggregator`, `heavy_hitters`, `index`)
+    et le `reporter` utilisé par les méthodes d'affichage sont mutables et ne sont pas thread-safe : utilisez-en un par thread
+    (puis `HeavyHitterTracker.merge`, par exemple) ou protégez-les vous-même.
+    `conversation_history` est propre à chaque instance.
+    """
     
-    def __init__(self):
+    def __init__(self, rate_aggregator: Optional['ErrorRateAggregator'] = None,
+                 heavy_hitters: Optional['HeavyHitterTracker'] = None,
+                 index: Optional['AnalysisIndex'] = None,
+                 reporter: Optional[ResultReporter] = None):
         self.parser = ErrorParser()
         self.chatbot = ErrorChatbot()
         self.conversation_history = []
+        self.rate_aggregator = rate_aggregator
+        self.heavy_hitters = heavy_hitters
+        self.index = index
+        self.reporter = reporter if reporter is not None else ResultReporter()
     
     def analyze_error_report(self, error_report: str) -> List[Dict]:
         """Analyse un rapport d'erreur complet"""
         errors = self.parser.parse_error(error_report)
+        if self.rate_aggregator is not None:
+            self.rate_aggregator.add_many(errors)
         results = []
         
         for error in errors:
             explanation = self.chatbot.explain_error(error)
             results.append(explanation)
         
+        if self.heavy_hitters is not None:
+            self.heavy_hitters.add_many(results)
+        
         return results
     
     def interactive_chat(self):
         """Mode interactif du chatbot"""
-        print("=" * 70)
-        print("🤖 Chatbot d'Analyse d'Erreurs de Programmation")
-        print("=" * 70)
-        print(self.chatbot.chat("bonjour"))
-        print("\nTapez 'quit' ou 'exit' pour quitter.\n")
+        reporter = self.reporter
+        reporter.write_banner(self.chatbot.chat("bonjour"))
         
         while True:
-            user_input = input("\n👤 Vous: ").strip()
+            # ask() vide la sortie en attente : un seul flush par message
+            user_input = reporter.ask('user_prompt')
             
             if user_input.lower() in ['quit', 'exit', 'quitter']:
-                print("\n🤖 Assistant: Au revoir! Bon codage!")
+                reporter.write_assistant("Au revoir! Bon codage!")
+                reporter.flush()
                 break
             
             if not user_input:
                 continue
             
             # Vérifier si c'est un rapport d'erreur
-            if any(keyword in user_input for keyword in ['Error', 'Exception', 'Traceback', 'at ']):
-                print("\n🔍 Analyse du rapport d'erreur en cours...\n")
-                results = self.analyze_error_report(user_input)
-                
-                for i, result in enumerate(results, 1):
-                    print(f"\n{'=' * 70}")
-                    print(f"📋 Erreur #{i}: {result['error_type']}")
-                    print(f"{'=' * 70}")
-                    
-                    if result['file']:
-                        print(f"📁 Fichier: {result['file']}")
-                    if result['line']:
-                        print(f"📍 Ligne: {result['line']}")
-                    if result['code_snippet']:
-                        print(f"💻 Code: {result['code_snippet']}")
-                    
-                    print(f"\n💬 Message: {result['message']}")
-                    print(f"\n📖 Explication:")
-                    print(f"   {result['explanation']}")
-                    
-                    print(f"\n🔍 Causes possibles:")
-                    for cause in result['causes_possibles']:
-                        print(f"   • {cause}")
-                    
-                    print(f"\n✅ Solutions proposées:")
-                    for solution in result['solutions']:
-                        print(f"   • {solution}")
+            if self._is_error_report(user_input):
+                reporter.write_analyzing()
+                reporter.write_results(self.analyze_error_report(user_input))
             else:
                 # Réponse du chatbot
-                response = self.chatbot.chat(user_input)
-                print(f"\n🤖 Assistant: {response}")
+                reporter.write_assistant(self.chatbot.chat(user_input))
     
-    def analyze_from_file(self, file_path: str) -> List[Dict]:
-        """Analyse un rapport d'erreur depuis un fichier"""
+    def _is_error_report(self, text: str) -> bool:
+        """Distingue un rapport d'erreur d'une question (ex: "explique KeyError")"""
+        return (self.parser.detect_language(text) != 'unknown'
+                or re.search(r'\w+(?:Error|Exception): ', text) is not None)
+    
+    def _read_report(self, file_path: str) -> Optional[tuple]:
+        """Lit un rapport (octets bruts, texte) ou affiche l'erreur et retourne None"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                error_report = f.read()
-            return self.analyze_error_report(error_report)
+            with open(file_path, 'rb') as f:
+                content = f.read()
+            return content, content.decode('utf-8')
         except FileNotFoundError:
-            print(f"❌ Erreur: Le fichier '{file_path}' n'a pas été trouvé.")
-            return []
+            self.reporter.write_failure(f"Erreur: Le fichier '{file_path}' n'a pas été trouvé.")
+            return None
         except Exception as e:
-            print(f"❌ Erreur lors de la lecture du fichier: {e}")
+            self.reporter.write_failure(f"Erreur lors de la lecture du fichier: {e}")
+            return None
+    
+    def analyze_from_file(self, file_path: str) -> List[Dict]:
+        """Analyse un rapport d'erreur depuis un fichier"""
+        report = self._read_report(file_path)
+        if report is None:
             return []
+        content, error_report = report
+        results = self.analyze_error_report(error_report)
+        # Les erreurs d'index ne sont pas des erreurs de lecture : elles remontent
+        if self.index is not None:
+            self.index.store_report(file_path, results, content)
+        return results
+    
+    def index_directory(self, directory: str, pattern: str = '*.txt') -> Dict[str, int]:
+        """Indexe les rapports d'un répertoire en ignorant les fichiers inchangés
+        
+        Les rapports supprimés du disque sont retirés de l'index ; les fichiers
+        illisibles sont comptés dans `failed` et retentés au prochain passage.
+        """
+        if self.index is None:
+            raise ValueError("Aucun index configuré pour cet analyseur")
+        stats = {'indexed': 0, 'skipped': 0, 'failed': 0, 'removed': 0}
+        seen = set()
+        for file_path in sorted(glob.glob(os.path.join(directory, '**', pattern), recursive=True)):
+            seen.add(os.path.abspath(file_path))
+            if self.index.is_up_to_date(file_path):
+                stats['skipped'] += 1
+                continue
+            report = self._read_report(file_path)
+            if report is None:
+                stats['failed'] += 1
+                continue
+            content, error_report = report
+            self.index.store_report(file_path, self.analyze_error_report(error_report), content)
+            stats['indexed'] += 1
+        stats['removed'] = self.index.remove_missing(directory, seen, pattern)
+        return stats
     
     def export_analysis(self, results: List[Dict], output_file: str):
         """Exporte l'analyse au format JSON"""
         try:
             with open(output_file, 'w', encoding='utf-8') as f:
                 json.dump(results, f, ensure_ascii=False, indent=2)
-            print(f"✅ Analyse exportée dans '{output_file}'")
+            self.reporter.write_success(f"Analyse exportée dans '{output_file}'")
         except Exception as e:
-            print(f"❌ Erreur lors de l'export: {e}")
+            self.reporter.write_failure(f"Erreur lors de l'export: {e}")
+
+
+def error_signature(error_type: str, message: Optional[str]) -> str:
+    """Signature d'une erreur : type + message sans valeurs variables"""
+    message = message or ''
+    message = re.sub(r"'[^']*'|\"[^\"]*\"", '<str>', message)
+    message = re.sub(r'0x[0-9a-fA-F]+|\d+', '<n>', message)
+    return f"{error_type}: {message.strip()[:200]}"
+
+
+class ErrorRateAggregator:
+    """Agrège le nombre d'erreurs par minute sur une fenêtre glissante
+    
+    Chaque série (type d'erreur, ou signature si `by_signature`) dispose d'un
+    tampon circulaire de `window_minutes` compteurs, et une série sans erreur
+    sur toute la fenêtre est supprimée : la mémoire est en
+    O(séries actives dans la fenêtre × window_minutes), quelle que soit la
+    durée du flux ou le nombre total de signatures rencontrées.
+    
+    Les pics sont détectés par z-score sur une moyenne/variance exponentielles
+    (EWMA) des minutes écoulées, après `warmup_minutes` minutes d'historique.
+    L'écart-type est borné par le bas par max(sqrt(moyenne), 1), comme pour
+    un processus de Poisson, pour qu'un débit régulier ne déclenche pas
+    d'alerte à la moindre variation.
+    
+    Seul le temps des logs est utilisé : une erreur sans horodatage est
+    rattachée à la dernière minute de log observée, ou comptée à part dans
+    `untimestamped` si aucune n'a encore été vue.
+    """
+    
+    def __init__(self, window_minutes: int = 60, alpha: float = 0.3,
+                 z_threshold: float = 3.0, min_count: int = 5,
+                 by_signature: bool = False, warmup_minutes: int = 5):
+        if window_minutes < 1:
+            raise ValueError("window_minutes doit être supérieur ou égal à 1")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha doit être compris dans ]0, 1]")
+        self.window_minutes = window_minutes
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self.by_signature = by_signature
+        self.warmup_minutes = warmup_minutes
+        self.untimestamped = {}
+        self._series = {}
+        self._latest_minute = None
+    
+    @staticmethod
+    def _to_minute(timestamp: str) -> int:
+        """Convertit un horodatage ISO en index de minute (epoch // 60)"""
+        return int(datetime.fromisoformat(timestamp).timestamp() // 60)
+    
+    def _new_series(self) -> Dict:
+        return {
+            'counts': [0] * self.window_minutes,
+            'minutes': [None] * self.window_minutes,
+            'current': None,
+            'mean': 0.0,
+            'var': 0.0,
+            'observed': 0,
+        }
+    
+    def _fold(self, series: Dict, value: int):
+        """Intègre le compteur d'une minute terminée dans l'EWMA"""
+        if series['observed'] == 0:
+            series['mean'] = float(value)
+        else:
+            diff = value - series['mean']
+            incr = self.alpha * diff
+            series['mean'] += incr
+            series['var'] = (1 - self.alpha) * (series['var'] + diff * incr)
+        series['observed'] += 1
+    
+    def _bucket(self, series: Dict, minute: int) -> int:
+        """Retourne le compteur de la minute donnée (0 si expiré)"""
+        slot = minute % self.window_minutes
+        return series['counts'][slot] if series['minutes'][slot] == minute else 0
+    
+    def _advance(self, series: Dict, minute: int):
+        """Clôt les minutes écoulées jusqu'à `minute` exclue"""
+        current = series['current']
+        if current is None:
+            series['current'] = minute
+            return
+        if minute <= current:
+            return
+        # Au-delà de la fenêtre, les minutes vides supplémentaires sont bornées
+        for closed in range(current, min(minute, current + self.window_minutes)):
+            self._fold(series, self._bucket(series, closed))
+        series['current'] = minute
+    
+    def add(self, error: ErrorInfo, count: int = 1):
+        """Comptabilise une erreur issue de ErrorParser"""
+        if self.by_signature:
+            key = error_signature(error.error_type, error.message)
+        else:
+            key = error.error_type
+        
+        if error.timestamp:
+            minute = self._to_minute(error.timestamp)
+        elif self._latest_minute is not None:
+            minute = self._latest_minute
+        else:
+            self.untimestamped[key] = self.untimestamped.get(key, 0) + count
+            return
+        
+        if self._latest_minute is not None and minute <= self._latest_minute - self.window_minutes:
+            return  # Trop ancienne pour la fenêtre
+        if self._latest_minute is None or minute > self._latest_minute:
+            self._latest_minute = minute
+            self._evict_expired()
+        
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = self._new_series()
+        
+        self._advance(series, minute)
+        if minute <= series['current'] - self.window_minutes:
+            return  # Trop ancienne pour la fenêtre
+        
+        slot = minute % self.window_minutes
+        if series['minutes'][slot] != minute:
+            series['minutes'][slot] = minute
+            series['counts'][slot] = 0
+        series['counts'][slot] += count
+    
+    def _evict_expired(self):
+        """Supprime les séries sans erreur dans la fenêtre courante"""
+        horizon = self._latest_minute - self.window_minutes
+        expired = [key for key, series in self._series.items() if series['current'] <= horizon]
+        for key in expired:
+            del self._series[key]
+    
+    def add_many(self, errors: Iterable[ErrorInfo]):
+        """Comptabilise une liste d'erreurs (sortie de ErrorParser.parse_error)"""
+        for error in errors:
+            self.add(error)
+    
+    def _z_score(self, series: Dict, value: int) -> float:
+        std = max(math.sqrt(series['var']), math.sqrt(series['mean']), 1.0)
+        return (value - series['mean']) / std
+    
+    def snapshot(self, now: Optional[str] = None) -> Dict[str, Dict]:
+        """Retourne l'état courant de chaque série
+        
+        `per_minute` liste les compteurs de la plus ancienne à la plus récente
+        minute de la fenêtre se terminant à `now` (par défaut la dernière
+        minute observée).
+        """
+        if now is not None:
+            end = self._to_minute(now)
+        elif self._latest_minute is not None:
+            end = self._latest_minute
+        else:
+            return {}
+        
+        start = end - self.window_minutes + 1
+        snapshot = {}
+        for key, series in self._series.items():
+            per_minute = [self._bucket(series, minute) for minute in range(start, end + 1)]
+            current = per_minute[-1]
+            z_score = self._z_score(series, current) if series['observed'] else 0.0
+            snapshot[key] = {
+                'total': sum(per_minute),
+                'per_minute': per_minute,
+                'rate_per_minute': sum(per_minute) / self.window_minutes,
+                'current': current,
+                'ewma': series['mean'],
+                'z_score': z_score,
+                'spike': (series['observed'] >= self.warmup_minutes
+                          and current >= self.min_count and z_score >= self.z_threshold),
+            }
+        return snapshot
+    
+    def spikes(self, now: Optional[str] = None) -> List[str]:
+        """Liste des séries en pic sur la minute courante"""
+        return [key for key, stats in self.snapshot(now).items()
+                if stats['spike']]
+
+
+class CountMinSketch:
+    """Count-Min Sketch : estimation de fréquences en mémoire fixe
+    
+    Les estimations ne sont jamais sous-évaluées ; la surestimation est au plus
+    e/width * total avec une probabilité 1 - exp(-depth). Le hachage est
+    déterministe (blake2b) pour que des sketches de processus différents
+    puissent être fusionnés.
+    """
+    
+    def __init__(self, width: int = 2048, depth: int = 4):
+        if width < 1 or depth < 1:
+            raise ValueError("width et depth doivent être supérieurs ou égaux à 1")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.table = [[0] * width for _ in range(depth)]
+    
+    def _indexes(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + row * h2) % self.width for row in range(self.depth)]
+    
+    def add(self, key: str, count: int = 1):
+        """Incrémente le compteur de `key`"""
+        for row, index in enumerate(self._indexes(key)):
+            self.table[row][index] += count
+        self.total += count
+    
+    def estimate(self, key: str) -> int:
+        """Fréquence estimée (borne supérieure) de `key`"""
+        return min(self.table[row][index] for row, index in enumerate(self._indexes(key)))
+    
+    def merge(self, other: 'CountMinSketch'):
+        """Fusionne un sketch de mêmes dimensions dans celui-ci"""
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Impossible de fusionner des sketches de dimensions différentes")
+        for row, other_row in zip(self.table, other.table):
+            for index, value in enumerate(other_row):
+                row[index] += value
+        self.total += other.total
+    
+    def to_dict(self) -> Dict:
+        return {'width': self.width, 'depth': self.depth,
+                'total': self.total, 'table': self.table}
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CountMinSketch':
+        sketch = cls(data['width'], data['depth'])
+        sketch.total = data['total']
+        sketch.table = [list(row) for row in data['table']]
+        return sketch
+
+
+class SpaceSaving:
+    """Algorithme Space-Saving : top-K des éléments les plus fréquents
+    
+    Conserve au plus `capacity` compteurs. Chaque compteur garde l'erreur
+    maximale commise lors de son remplacement, de sorte que le vrai compte
+    est compris entre `count - error` et `count`.
+    
+    Le moins fréquent est trouvé via un tas-min à invalidation paresseuse :
+    chaque clé y a une seule entrée, remise à jour seulement quand elle
+    remonte au sommet avec un compte périmé (O(log k) amorti par ajout).
+    """
+    
+    def __init__(self, capacity: int = 100):
+        if capacity < 1:
+            raise ValueError("capacity doit être supérieur ou égal à 1")
+        self.capacity = capacity
+        self.counters = {}
+        self._heap = []
+    
+    def _rebuild_heap(self):
+        self._heap = [(counter[0], key) for key, counter in self.counters.items()]
+        heapq.heapify(self._heap)
+    
+    def _min_key(self) -> str:
+        """Clé de plus petit compte, en rafraîchissant les entrées périmées"""
+        heap = self._heap
+        while True:
+            count, key = heap[0]
+            current = self.counters[key][0]
+            if current == count:
+                return key
+            heapq.heapreplace(heap, (current, key))
+    
+    def add(self, key: str, count: int = 1):
+        """Comptabilise `count` occurrences de `key`"""
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += count
+        elif len(self.counters) < self.capacity:
+            self.counters[key] = [count, 0]
+            heapq.heappush(self._heap, (count, key))
+        else:
+            # Remplace l'élément le moins fréquent
+            victim = self._min_key()
+            floor = self.counters.pop(victim)[0]
+            self.counters[key] = [floor + count, floor]
+            heapq.heapreplace(self._heap, (floor + count, key))
+    
+    def _floor(self) -> int:
+        if len(self.counters) < self.capacity:
+            return 0
+        return self.counters[self._min_key()][0]
+    
+    def merge(self, other: 'SpaceSaving'):
+        """Fusionne un autre résumé (Agarwal et al., mergeable summaries)"""
+        self_floor = self._floor()
+        other_floor = other._floor()
+        merged = {}
+        for key in set(self.counters) | set(other.counters):
+            count_a, error_a = self.counters.get(key, (self_floor, self_floor))
+            count_b, error_b = other.counters.get(key, (other_floor, other_floor))
+            merged[key] = [count_a + count_b, error_a + error_b]
+        top = sorted(merged.items(), key=lambda item: item[1][0], reverse=True)
+        self.capacity = max(self.capacity, other.capacity)
+        self.counters = dict(top[:self.capacity])
+        self._rebuild_heap()
+    
+    def top(self, n: Optional[int] = None) -> List[tuple]:
+        """Retourne les `n` éléments les plus fréquents (clé, compte, erreur)"""
+        ranked = sorted(self.counters.items(), key=lambda item: item[1][0], reverse=True)
+        return [(key, count, error) for key, (count, error) in ranked[:n]]
+    
+    def to_dict(self) -> Dict:
+        return {'capacity': self.capacity, 'counters': self.counters}
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SpaceSaving':
+        summary = cls(data['capacity'])
+        summary.counters = {key: list(value) for key, value in data['counters'].items()}
+        summary._rebuild_heap()
+        return summary
+
+
+class HeavyHitterTracker:
+    """Suivi probabiliste des types et signatures d'erreurs les plus fréquents
+    
+    Combine un Count-Min Sketch et deux résumés Space-Saving (types et
+    signatures) : la mémoire est fixée par `width`, `depth` et `top_k`, quel
+    que soit le nombre de messages distincts. L'état est fusionnable entre
+    processus via `merge()` ou `to_dict()` / `from_dict()`.
+    """
+    
+    def __init__(self, width: int = 2048, depth: int = 4, top_k: int = 50):
+        self.sketch = CountMinSketch(width, depth)
+        self.top_types = SpaceSaving(top_k)
+        self.top_signatures = SpaceSaving(top_k)
+    
+    @staticmethod
+    def signature(result: Dict) -> str:
+        """Signature d'un résultat d'analyse (voir error_signature)"""
+        return error_signature(result['error_type'], result.get('message'))
+    
+    def add(self, result: Dict):
+        """Comptabilise un résultat de ErrorAnalyzerChatbot.analyze_error_report"""
+        error_type = result['error_type']
+        signature = self.signature(result)
+        self.sketch.add('type:' + error_type)
+        self.sketch.add('sig:' + signature)
+        self.top_types.add(error_type)
+        self.top_signatures.add(signature)
+    
+    def add_many(self, results: Iterable[Dict]):
+        for result in results:
+            self.add(result)
+    
+    def _report(self, summary: SpaceSaving, prefix: str, n: int) -> List[Dict]:
+        report = []
+        for key, count, error in summary.top(n):
+            # Les deux structures surestiment : on garde la borne la plus serrée
+            upper = min(count, self.sketch.estimate(prefix + key))
+            report.append({'key': key, 'count': upper, 'min_count': max(count - error, 0)})
+        return report
+    
+    def top_error_types(self, n: int = 10) -> List[Dict]:
+        """Types d'erreurs les plus fréquents avec bornes de comptage"""
+        return self._report(self.top_types, 'type:', n)
+    
+    def top_error_signatures(self, n: int = 10) -> List[Dict]:
+        """Signatures d'erreurs les plus fréquentes avec bornes de comptage"""
+        return self._report(self.top_signatures, 'sig:', n)
+    
+    def merge(self, other: 'HeavyHitterTracker'):
+        """Fusionne l'état d'un autre tracker (ex: d'un autre processus)"""
+        self.sketch.merge(other.sketch)
+        self.top_types.merge(other.top_types)
+        self.top_signatures.merge(other.top_signatures)
+    
+    def to_dict(self) -> Dict:
+        return {'sketch': self.sketch.to_dict(),
+                'top_types': self.top_types.to_dict(),
+                'top_signatures': self.top_signatures.to_dict()}
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'HeavyHitterTracker':
+        tracker = cls.__new__(cls)
+        tracker.sketch = CountMinSketch.from_dict(data['sketch'])
+        tracker.top_types = SpaceSaving.from_dict(data['top_types'])
+        tracker.top_signatures = SpaceSaving.from_dict(data['top_signatures'])
+        return tracker
+
+
+class AnalysisIndex:
+    """Index SQLite persistant des analyses pour les requêtes ultérieures
+    
+    Les rapports sont identifiés par leur chemin absolu ; taille, date de
+    modification et empreinte SHA-256 permettent de ne réindexer que les
+    fichiers modifiés.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS reports (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            sha256 TEXT NOT NULL,
+            indexed_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS errors (
+            id INTEGER PRIMARY KEY,
+            report_path TEXT NOT NULL REFERENCES reports(path),
+            error_type TEXT NOT NULL,
+            message TEXT,
+            file TEXT,
+            line INTEGER,
+            language TEXT,
+            timestamp TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_errors_report ON errors(report_path);
+        CREATE INDEX IF NOT EXISTS idx_errors_type ON errors(error_type);
+        CREATE INDEX IF NOT EXISTS idx_errors_language ON errors(language);
+        CREATE INDEX IF NOT EXISTS idx_errors_file ON errors(file);
+        CREATE INDEX IF NOT EXISTS idx_errors_timestamp ON errors(timestamp);
+    """
+    
+    def __init__(self, db_path: str = 'error_index.db'):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(self.SCHEMA)
+    
+    @staticmethod
+    def _file_hash(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def is_up_to_date(self, report_path: str) -> bool:
+        """Indique si le rapport est déjà indexé dans sa version actuelle"""
+        path = os.path.abspath(report_path)
+        row = self.connection.execute(
+            'SELECT size, mtime, sha256 FROM reports WHERE path = ?', (path,)
+        ).fetchone()
+        if row is None:
+            return False
+        stat = os.stat(path)
+        if row['size'] == stat.st_size and row['mtime'] == stat.st_mtime:
+            return True
+        if row['size'] != stat.st_size or row['sha256'] != self._file_hash(path):
+            return False
+        # Contenu identique (ex: fichier touché) : on met juste à jour la date
+        with self.connection:
+            self.connection.execute('UPDATE reports SET mtime = ? WHERE path = ?',
+                                    (stat.st_mtime, path))
+        return True
+    
+    def store_report(self, report_path: str, results: List[Dict], content: bytes):
+        """Remplace les résultats indexés pour un rapport
+        
+        `content` est le contenu brut analysé : l'empreinte enregistrée
+        correspond ainsi exactement aux résultats indexés.
+        """
+        path = os.path.abspath(report_path)
+        stat = os.stat(path)
+        rows = [
+            (path, result['error_type'], result.get('message'), result.get('file'),
+             result.get('line'), result.get('language'),
+             # Seul le temps des logs est indexé, jamais l'heure de l'analyse
+             result.get('timestamp') if result.get('timestamp_source') == 'log' else None,
+             json.dumps(result, ensure_ascii=False))
+            for result in results
+        ]
+        with self.connection:
+            self.connection.execute('DELETE FROM errors WHERE report_path = ?', (path,))
+            self.connection.execute(
+                'INSERT OR REPLACE INTO reports (path, size, mtime, sha256, indexed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (path, len(content), stat.st_mtime, hashlib.sha256(content).hexdigest(),
+                 datetime.now().isoformat())
+            )
+            self.connection.executemany(
+                'INSERT INTO errors (report_path, error_type, message, file, line, '
+                'language, timestamp, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+    
+    @staticmethod
+    def _normalize_timestamp(value: str) -> str:
+        """Met un horodatage au format stocké (ex: '2024-05-01 13:00' -> '2024-05-01T13:00:00')"""
+        return datetime.fromisoformat(value).isoformat()
+    
+    def query(self, error_type: Optional[str] = None, language: Optional[str] = None,
+              file: Optional[str] = None, since: Optional[str] = None,
+              until: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Recherche les erreurs indexées
+        
+        `file` accepte un motif glob (ex: 'payments/*.py'). Un chemin relatif
+        est ancré sur des composants de chemin : 'payments/*.py' trouve aussi
+        '/srv/app/payments/billing.py'. `since` et `until` sont des
+        horodatages ISO inclusifs comparés au temps des logs ; les erreurs
+        sans horodatage de log en sont exclues.
+        """
+        clauses = []
+        params = []
+        if error_type:
+            clauses.append('error_type = ?')
+            params.append(error_type)
+        if language:
+            clauses.append('language = ?')
+            params.append(language)
+        if file:
+            is_glob = any(c in file for c in '*?[')
+            if os.path.isabs(file) or file.startswith('*'):
+                clauses.append('file GLOB ?' if is_glob else 'file = ?')
+                params.append(file)
+            elif is_glob:
+                clauses.append('(file GLOB ? OR file GLOB ?)')
+                params.extend([file, '*/' + file])
+            else:
+                clauses.append('(file = ? OR substr(file, -?) = ?)')
+                params.extend([file, len(file) + 1, '/' + file])
+        if since:
+            clauses.append('timestamp >= ?')
+            params.append(self._normalize_timestamp(since))
+        if until:
+            clauses.append('timestamp <= ?')
+            params.append(self._normalize_timestamp(until))
+        
+        sql = 'SELECT report_path, data FROM errors'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY timestamp, id'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        
+        results = []
+        for row in self.connection.execute(sql, params):
+            result = json.loads(row['data'])
+            result['report_path'] = row['report_path']
+            results.append(result)
+        return results
+    
+    def remove_missing(self, directory: str, seen: Iterable[str], pattern: str = '*') -> int:
+        """Retire les rapports de `directory` absents de `seen` ; retourne leur nombre
+        
+        Seuls les chemins correspondant à `pattern` sont concernés : réindexer
+        avec un autre motif ne supprime pas les rapports indexés avec le premier.
+        """
+        prefix = os.path.join(os.path.abspath(directory), '')
+        seen = set(seen)
+        rows = self.connection.execute(
+            'SELECT path FROM reports WHERE substr(path, 1, ?) = ?', (len(prefix), prefix)
+        )
+        missing = [(row['path'],) for row in rows
+                   if row['path'] not in seen
+                   and fnmatch.fnmatch(os.path.basename(row['path']), pattern)]
+        with self.connection:
+            self.connection.executemany('DELETE FROM errors WHERE report_path = ?', missing)
+            self.connection.executemany('DELETE FROM reports WHERE path = ?', missing)
+        return len(missing)
+    
+    def count_by_type(self) -> Dict[str, int]:
+        """Nombre d'erreurs indexées par type"""
+        rows = self.connection.execute(
+            'SELECT error_type, COUNT(*) AS n FROM errors GROUP BY error_type ORDER BY n DESC'
+        )
+        return {row['error_type']: row['n'] for row in rows}
+    
+    def close(self):
+        self.connection.close()
+
+
+def _index_command(argv: List[str]):
+    """Sous-commandes `index` et `query` de la ligne de commande"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='error_analyzer.py')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    index_parser = subparsers.add_parser('index', help="Indexer un répertoire de rapports")
+    index_parser.add_argument('directory')
+    index_parser.add_argument('--pattern', default='*.txt')
+    index_parser.add_argument('--db', default='error_index.db')
+    
+    query_parser = subparsers.add_parser('query', help="Interroger l'index")
+    query_parser.add_argument('--db', default='error_index.db')
+    query_parser.add_argument('--type', dest='error_type')
+    query_parser.add_argument('--language')
+    query_parser.add_argument('--file')
+    query_parser.add_argument('--since')
+    query_parser.add_argument('--until')
+    query_parser.add_argument('--limit', type=int)
+    
+    args = parser.parse_args(argv)
+    index = AnalysisIndex(args.db)
+    try:
+        if args.command == 'index':
+            analyzer = ErrorAnalyzerChatbot(index=index)
+            stats = analyzer.index_directory(args.directory, args.pattern)
+            print(f"✅ {stats['indexed']} rapport(s) indexé(s), {stats['skipped']} inchangé(s), "
+                  f"{stats['removed']} retiré(s), {stats['failed']} en échec")
+        else:
+            try:
+                results = index.query(args.error_type, args.language, args.file,
+                                      args.since, args.until, args.limit)
+            except ValueError as e:
+                parser.error(f"horodatage invalide: {e}")
+            for result in results:
+                location = f"{result['file']}:{result['line']}" if result['file'] else '-'
+                print(f"{result['error_type']}\t{location}\t{result['report_path']}\t{result['message']}")
+            print(f"\n📊 {len(results)} erreur(s) trouvée(s)")
+    finally:
+        index.close()
 
 
 def main():
     """Fonction principale"""
-    import sys
+    import argparse
+    
+    if len(sys.argv) > 1 and sys.argv[1] in ('index', 'query'):
+        _index_command(sys.argv[1:])
+        return
     
-    analyzer = ErrorAnalyzerChatbot()
+    parser = argparse.ArgumentParser(prog='error_analyzer.py')
+    parser.add_argument('files', nargs='*', help="Rapports d'erreurs à analyser")
+    parser.add_argument('--summary', action='store_true',
+                        help="Afficher le nombre d'erreurs par type au lieu du détail")
+    parser.add_argument('--plain', action='store_true', help="Sortie sans emojis")
+    args = parser.parse_args()
+    if args.summary and not args.files:
+        parser.error("--summary nécessite au moins un fichier à analyser")
     
-    # Si un fichier est passé en argument
-    if len(sys.argv) > 1:
-        file_path = sys.argv[1]
-        print(f"📂 Analyse du fichier: {file_path}\n")
-        results = analyzer.analyze_from_file(file_path)
+    # Si des fichiers sont passés en argument
+    if args.files:
+        reporter = ResultReporter(plain=args.plain, detailed=False)
+        analyzer = ErrorAnalyzerChatbot(reporter=reporter)
+        results = []
+        for file_path in args.files:
+            if not args.summary:
+                reporter.write_source(file_path)
+            file_results = analyzer.analyze_from_file(file_path)
+            if not args.summary:
+                reporter.write_results(file_results, start=len(results) + 1)
+            results.extend(file_results)
+        
+        if args.summary:
+            reporter.write_summary(results)
+        reporter.flush()
         
         if results:
-            for i, result in enumerate(results, 1):
-                print(f"\n{'=' * 70}")
-                print(f"📋 Erreur #{i}: {result['error_type']}")
-                print(f"{'=' * 70}")
-                
-                if result['file']:
-                    print(f"📁 Fichier: {result['file']}")
-                if result['line']:
-                    print(f"📍 Ligne: {result['line']}")
-                
-                print(f"\n💬 Message: {result['message']}")
-                print(f"\n📖 Explication:")
-                print(f"   {result['explanation']}")
-                
-                print(f"\n✅ Solutions proposées:")
-                for solution in result['solutions']:
-                    print(f"   • {solution}")
-            
             # Option d'export
-            export = input("\n💾 Voulez-vous exporter l'analyse en JSON? (o/n): ").strip().lower()
+            export = reporter.ask('export_prompt').lower()
             if export == 'o':
-                output_file = input("📝 Nom du fichier de sortie (par défaut: analysis.json): ").strip()
+                output_file = reporter.ask('output_prompt')
                 if not output_file:
                     output_file = "analysis.json"
                 analyzer.export_analysis(results, output_file)
     else:
         # Mode interactif
-        analyzer.interactive_chat()
+        ErrorAnalyzerChatbot(reporter=ResultReporter(plain=args.plain)).interactive_chat()
 
 
 if __name__ == "__main__":
@@ -4,7 +4,17 @@
 Script de test pour l'analyseur d'erreurs
 """
 
-from error_analyzer import ErrorAnalyzerChatbot
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from unittest import mock
+
+from error_analyzer import (AnalysisIndex, ErrorAnalyzerChatbot, ErrorInfo, ErrorRateAggregator,
+                            HeavyHitterTracker, ResultReporter)
 
 def test_python_errors():
     """Test l'analyse d'erreurs Python"""
@@ -87,5 +97,342 @@ IndexError: list index out of range"""
     print("✅ TOUS LES TESTS ONT RÉUSSI!")
     print("=" * 70)
 
+def test_error_rate_aggregation():
+    """Test l'agrégation par minute et la détection de pics"""
+    aggregator = ErrorRateAggregator(window_minutes=10, min_count=5)
+    analyzer = ErrorAnalyzerChatbot(rate_aggregator=aggregator)
+    
+    log = """2024-05-01 12:00:03,120 ERROR worker crashed
+Traceback (most recent call last):
+  File "worker.py", line 42, in run
+    data = payload['id']
+KeyError: 'id'"""
+    
+    results = analyzer.analyze_error_report(log)
+    assert results[0]['timestamp'] == '2024-05-01T12:00:03.120000'
+    print(f"✅ Horodatage du log conservé: {results[0]['timestamp']}")
+    
+    # Trafic de fond régulier: 1 KeyError par minute
+    for minute in range(1, 8):
+        analyzer.analyze_error_report(log.replace('12:00:03', f'12:0{minute}:03'))
+    assert aggregator.spikes() == []
+    
+    # Pic soudain à 12:08
+    for _ in range(20):
+        analyzer.analyze_error_report(log.replace('12:00:03', '12:08:30'))
+    
+    snapshot = aggregator.snapshot()
+    assert snapshot['KeyError']['current'] == 20
+    assert snapshot['KeyError']['total'] == 28
+    assert len(snapshot['KeyError']['per_minute']) == 10
+    assert aggregator.spikes() == ['KeyError']
+    print(f"✅ Pic détecté: {aggregator.spikes()}")
+    
+    # Les minutes sorties de la fenêtre sont oubliées
+    snapshot = aggregator.snapshot(now='2024-05-01T12:17:00')
+    assert snapshot['KeyError']['total'] == 20
+    print("✅ Fenêtre glissante respectée")
+    
+    # Sans horodatage : jamais l'horloge murale, la dernière minute de log
+    aggregator = ErrorRateAggregator(window_minutes=10, by_signature=True)
+    analyzer = ErrorAnalyzerChatbot(rate_aggregator=aggregator)
+    untimed = log.split('\n', 1)[1]
+    analyzer.analyze_error_report(untimed)
+    assert aggregator.untimestamped == {"KeyError: <str>": 1}
+    analyzer.analyze_error_report(log)
+    analyzer.analyze_error_report(untimed)
+    assert aggregator.snapshot()["KeyError: <str>"]['total'] == 2
+    print("✅ Erreurs sans horodatage rattachées au temps des logs")
+    
+    # Débit régulier : une erreur de plus n'est pas un pic
+    aggregator = ErrorRateAggregator(window_minutes=10)
+    for minute in range(6):
+        for _ in range(11 if minute == 5 else 10):
+            aggregator.add(ErrorInfo('KeyError', "'id'", timestamp=f'2024-05-01T12:0{minute}:00'))
+    assert aggregator.snapshot()['KeyError']['current'] == 11
+    assert aggregator.spikes() == []
+    
+    # Pas d'alerte avant la fin du préchauffage
+    aggregator = ErrorRateAggregator(window_minutes=10)
+    aggregator.add(ErrorInfo('KeyError', "'id'", timestamp='2024-05-01T12:00:00'))
+    for _ in range(50):
+        aggregator.add(ErrorInfo('KeyError', "'id'", timestamp='2024-05-01T12:01:00'))
+    assert aggregator.spikes() == []
+    print("✅ Pas de fausse alerte sur débit régulier ni pendant le préchauffage")
+    
+    # Mémoire bornée : les séries expirées sont supprimées
+    aggregator = ErrorRateAggregator(window_minutes=10, by_signature=True)
+    for i in range(500):
+        aggregator.add(ErrorInfo('KeyError', f'unique {chr(97 + i % 26)}{chr(97 + i // 26)}',
+                                 timestamp='2024-05-01T12:00:00'))
+    assert len(aggregator._series) == 500
+    aggregator.add(ErrorInfo('KeyError', "'id'", timestamp='2024-05-01T12:10:00'))
+    assert len(aggregator._series) == 1
+    print("✅ Séries expirées supprimées")
+
+def test_heavy_hitters():
+    """Test le suivi top-K probabiliste et la fusion entre workers"""
+    workers = [ErrorAnalyzerChatbot(heavy_hitters=HeavyHitterTracker(width=256, depth=4, top_k=5))
+               for _ in range(2)]
+    
+    for worker in workers:
+        for i in range(80):
+            worker.analyze_error_report(f"""Traceback (most recent call last):
+  File "app.py", line {i}, in <module>
+    total = 10 / count
+ZeroDivisionError: division by zero""")
+        # Longue traîne de messages uniques
+        for i in range(200):
+            worker.analyze_error_report(f"""Traceback (most recent call last):
+  File "app.py", line 3, in <module>
+    x = data['k{i}']
+KeyError: unique message {i} ref{chr(97 + i % 26)}x""")
+    
+    tracker = workers[0].heavy_hitters
+    assert len(tracker.top_signatures.counters) == 5
+    assert tracker.top_signatures._floor() == min(
+        count for count, _ in tracker.top_signatures.counters.values())
+    
+    # Fusion via un état sérialisable (transfert entre processus)
+    other = HeavyHitterTracker.from_dict(json.loads(json.dumps(workers[1].heavy_hitters.to_dict())))
+    tracker.merge(other)
+    
+    top_types = tracker.top_error_types(2)
+    assert [entry['key'] for entry in top_types] == ['KeyError', 'ZeroDivisionError']
+    assert top_types[0]['count'] == 400
+    assert top_types[1]['min_count'] <= 160 <= top_types[1]['count']
+    print(f"✅ Types les plus fréquents: {top_types}")
+    
+    top_signature = tracker.top_error_signatures(1)[0]
+    assert top_signature['key'] == 'ZeroDivisionError: division by zero'
+    assert top_signature['min_count'] <= 160 <= top_signature['count']
+    print(f"✅ Signature la plus fréquente: {top_signature}")
+
+def test_analysis_index():
+    """Test l'index SQLite et la réindexation incrémentale"""
+    workdir = tempfile.mkdtemp()
+    try:
+        reports_dir = os.path.join(workdir, 'reports')
+        shutil.copytree(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'examples'), reports_dir)
+        index = AnalysisIndex(os.path.join(workdir, 'index.db'))
+        analyzer = ErrorAnalyzerChatbot(index=index)
+        
+        stats = analyzer.index_directory(reports_dir)
+        assert stats == {'indexed': 4, 'skipped': 0, 'failed': 0, 'removed': 0}
+        
+        # Un fichier touché sans modification et un fichier modifié
+        os.utime(os.path.join(reports_dir, 'error_python_1.txt'))
+        with open(os.path.join(reports_dir, 'error_python_2.txt'), 'w', encoding='utf-8') as f:
+            f.write("""Traceback (most recent call last):
+  File "payments/billing.py", line 12, in charge
+    amount = order['amount']
+KeyError: 'amount'""")
+        stats = analyzer.index_directory(reports_dir)
+        assert stats == {'indexed': 1, 'skipped': 3, 'failed': 0, 'removed': 0}
+        print(f"✅ Réindexation incrémentale: {stats}")
+        
+        results = index.query(error_type='KeyError')
+        assert len(results) == 1
+        assert results[0]['report_path'].endswith('error_python_2.txt')
+        assert index.query(file='payments/*.py')[0]['line'] == 12
+        assert index.query(error_type='NameError') == []
+        assert index.count_by_type()['ZeroDivisionError'] == 1
+        print(f"✅ Requêtes sur l'index: {index.count_by_type()}")
+        
+        # Un rapport supprimé et un rapport illisible (UTF-8 invalide)
+        os.remove(os.path.join(reports_dir, 'error_python_1.txt'))
+        with open(os.path.join(reports_dir, 'broken.txt'), 'wb') as f:
+            f.write(b'\xff\xfe invalid')
+        stats = analyzer.index_directory(reports_dir)
+        assert stats == {'indexed': 0, 'skipped': 3, 'failed': 1, 'removed': 1}
+        assert 'ZeroDivisionError' not in index.count_by_type()
+        print(f"✅ Rapports supprimés et illisibles gérés: {stats}")
+        
+        # Réindexer avec un autre motif ne supprime pas les autres rapports
+        with open(os.path.join(reports_dir, 'service.log'), 'w', encoding='utf-8') as f:
+            f.write("""2024-05-01 13:05:00,000 ERROR request failed
+Traceback (most recent call last):
+  File "/srv/app/payments/refunds.py", line 7, in refund
+    total = amount / count
+ZeroDivisionError: division by zero""")
+        stats = analyzer.index_directory(reports_dir, '*.log')
+        assert stats == {'indexed': 1, 'skipped': 0, 'failed': 0, 'removed': 0}
+        stats = analyzer.index_directory(reports_dir)
+        assert stats == {'indexed': 0, 'skipped': 3, 'failed': 1, 'removed': 0}
+        assert index.count_by_type()['ZeroDivisionError'] == 1
+        print("✅ Réindexation avec plusieurs motifs sans perte")
+        
+        # Motif relatif ancré sur des composants de chemin absolus
+        files = sorted(r['file'] for r in index.query(file='payments/*.py'))
+        assert files == ['/srv/app/payments/refunds.py', 'payments/billing.py']
+        assert len(index.query(file='payments/refunds.py')) == 1
+        
+        # Seul le temps des logs est filtré ; les formats ISO sont normalisés
+        since = index.query(since='2024-05-01 13:00')
+        assert [r['error_type'] for r in since] == ['ZeroDivisionError']
+        assert index.query(until='2024-05-01 13:00') == []
+        print("✅ Filtres de fichier et de date conformes")
+        
+        # Les erreurs d'index remontent au lieu d'être masquées
+        index.close()
+        try:
+            analyzer.analyze_from_file(os.path.join(reports_dir, 'error_python_3.txt'))
+            assert False, "l'erreur d'index devrait remonter"
+        except sqlite3.ProgrammingError:
+            pass
+    finally:
+        shutil.rmtree(workdir)
+
+def test_result_reporter():
+    """Test l'affichage bufferisé, le mode sans emojis et le résumé"""
+    analyzer = ErrorAnalyzerChatbot()
+    results = analyzer.analyze_error_report("""Traceback (most recent call last):
+  File "app.py", line 10, in <module>
+    print(undefined_variable)
+NameError: name 'undefined_variable' is not defined""")
+    
+    stream = io.StringIO()
+    reporter = ResultReporter(stream)
+    reporter.write_results(results)
+    assert stream.getvalue() == ''  # Rien n'est écrit avant flush()
+    reporter.flush()
+    output = stream.getvalue()
+    assert output.startswith('\n' + '=' * 70 + '\n📋 Erreur #1: NameError\n')
+    assert '💻 Code: print(undefined_variable)\n' in output
+    assert '🔍 Causes possibles:\n   • Variable non déclarée\n' in output
+    print("✅ Rendu détaillé conforme")
+    
+    stream = io.StringIO()
+    plain = ResultReporter(stream, plain=True, detailed=False)
+    plain_analyzer = ErrorAnalyzerChatbot(reporter=plain)
+    plain.write_source('missing.txt')
+    assert plain_analyzer.analyze_from_file('missing.txt') == []
+    plain.write_results(results)
+    plain.flush()
+    output = stream.getvalue()
+    assert output.startswith("Analyse du fichier: missing.txt\n\nErreur: Le fichier 'missing.txt'")
+    assert 'Erreur #1: NameError' in output and 'Ligne: 10' in output
+    assert 'Causes possibles' not in output and 'Code:' not in output
+    assert all(ord(char) < 0x2000 for char in output)
+    print("✅ Mode sans emojis conforme")
+    
+    stream = io.StringIO()
+    reporter = ResultReporter(stream, plain=True)
+    reporter.write_summary(results * 3 + [dict(results[0], error_type='KeyError')])
+    reporter.flush()
+    assert stream.getvalue() == ('\nRésumé: 4 erreur(s), 2 type(s)\n'
+                                 '          3  NameError\n'
+                                 '          1  KeyError\n')
+    print("✅ Résumé groupé conforme")
+    
+    # Mode interactif sans emojis, via le même reporter
+    stream = io.StringIO()
+    interactive = ErrorAnalyzerChatbot(reporter=ResultReporter(stream, plain=True))
+    answers = iter(["hello", "KeyError: 'id'", "quit"])
+    with mock.patch('builtins.input', lambda prompt: stream.write(prompt) and next(answers)):
+        interactive.interactive_chat()
+    output = stream.getvalue()
+    assert "\nVous: \nAssistant: Hello!" in output
+    assert "Analyse du rapport d'erreur en cours...\n\n\n" + "=" * 70 + "\nErreur #1: " in output
+    assert output.endswith("\nAssistant: Au revoir! Bon codage!\n")
+    assert all(ord(char) < 0x2000 for char in output.replace('•', ''))
+    print("✅ Mode interactif sans emojis conforme")
+
+def test_chat_intents():
+    """Test la reconnaissance d'intentions et d'entités du chatbot"""
+    analyzer = ErrorAnalyzerChatbot()
+    engine = analyzer.chatbot.intent_engine
+    
+    match = engine.match("Comment corriger une key error ?")
+    assert (match.intent, match.language, match.entities) == ('solutions', 'fr', ['KeyError'])
+    match = engine.match("What is the difference between NameError and ReferenceError?")
+    assert (match.intent, match.language) == ('compare', 'en')
+    assert match.entities == ['NameError', 'ReferenceError']
+    assert engine.match("explique FooError").unknown_entities == ['FooError']
+    match = engine.match("explain file not found error")
+    assert (match.intent, match.entities) == ('explain', ['FileNotFoundError'])
+    print("✅ Intentions et entités reconnues")
+    
+    response = analyzer.chatbot.chat("explique KeyError")
+    assert response.startswith("KeyError: Cette erreur")
+    assert "Causes possibles" in response
+    assert analyzer.chatbot.chat("how to fix zero division error").startswith(
+        "Solutions for ZeroDivisionError:")
+    assert analyzer.chatbot.chat("hello").startswith("Hello!")
+    assert "FooError" in analyzer.chatbot.chat("explique FooError")
+    assert "pas bien compris" in analyzer.chatbot.chat("blabla")
+    print("✅ Réponses du chatbot conformes")
+    
+    assert not analyzer._is_error_report("explique KeyError")
+    assert analyzer._is_error_report("KeyError: 'id'")
+    print("✅ Questions distinguées des rapports d'erreurs")
+
+def test_thread_safety():
+    """Test l'analyse concurrente sur un cœur partagé"""
+    shared = ErrorAnalyzerChatbot()
+    reports = {
+        'ZeroDivisionError': """Traceback (most recent call last):
+  File "calc.py", line 10, in <module>
+    result = total / count
+ZeroDivisionError: division by zero""",
+        'KeyError': """2024-05-01 12:00:03 ERROR
+Traceback (most recent call last):
+  File "worker.py", line 42, in run
+    data = payload['id']
+KeyError: 'id'""",
+        'NullPointerException': """Exception in thread "main" java.lang.NullPointerException: oops
+    at com.example.App.main(App.java:14)""",
+    }
+    expected = {name: [{k: v for k, v in r.items() if k != 'timestamp'}
+                       for r in shared.analyze_error_report(report)]
+                for name, report in reports.items()}
+    
+    thread_count = 16
+    barrier = threading.Barrier(thread_count)
+    failures = []
+    
+    def worker(analyzer):
+        barrier.wait()
+        for _ in range(200):
+            for name, report in reports.items():
+                results = analyzer.analyze_error_report(report)
+                # Le résultat appartient à l'appelant : le modifier est sans effet
+                results[0]['solutions'].append('mutation locale')
+                results[0]['solutions'].pop()
+                if [{k: v for k, v in r.items() if k != 'timestamp'}
+                        for r in results] != expected[name]:
+                    failures.append(name)
+    
+    # Une instance partagée par tous les threads, puis une instance par thread
+    for analyzers in ([shared] * thread_count,
+                      [ErrorAnalyzerChatbot() for _ in range(thread_count)]):
+        threads = [threading.Thread(target=worker, args=(a,)) for a in analyzers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert failures == []
+    print(f"✅ {thread_count} threads x {200 * len(reports)} analyses concurrentes cohérentes")
+    
+    # Mémoire constante : base de connaissances et tables compilées partagées
+    other = ErrorAnalyzerChatbot()
+    assert other.chatbot.error_database is shared.chatbot.error_database
+    assert other.chatbot.intent_engine is shared.chatbot.intent_engine
+    assert other.parser.patterns is shared.parser.patterns
+    engine = other.chatbot.intent_engine
+    for table in (other.chatbot.error_database, engine.phrases, engine.error_index):
+        try:
+            table[('keyerror',)] = 'NameError'
+            assert False, "les tables partagées devraient être en lecture seule"
+        except TypeError:
+            pass
+    print("✅ Base de connaissances et tables d'intentions partagées en lecture seule")
+
 if __name__ == "__main__":
     test_python_errors()
+    test_error_rate_aggregation()
+    test_heavy_hitters()
+    test_analysis_index()
+    test_result_reporter()
+    test_chat_intents()
+    test_thread_safety()